@@ -1,9 +1,148 @@
-from abc import ABC, abstractmethod
-from collections import defaultdict
+import copy
+import heapq
+import sys
+import unicodedata
+from array import array
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from random import shuffle
-from copy import deepcopy
 
-from rapidfuzz import process, fuzz
+import numpy as np
+from rapidfuzz import process, fuzz, utils
+
+# Above this many distinct answers StringQuestion.group only compares answers within blocks. The
+# full matrix at this size is 100 MB and takes seconds, far beyond the answers a question collects
+_BLOCKING_MIN_ANSWERS = 10000
+
+try:
+    from numba import njit
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+
+
+def _find_root(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def _union(parent, i, j):
+    root_i, root_j = _find_root(parent, i), _find_root(parent, j)
+    # The smaller index stays the root so every component is named by its first row
+    if root_i < root_j:
+        parent[root_j] = root_i
+    elif root_j < root_i:
+        parent[root_i] = root_j
+
+
+def _union_similar(parent, sim, threshold):
+    n = sim.shape[0]
+    for i in range(n):
+        for j in range(i + 1, n):
+            if sim[i, j] >= threshold:
+                _union(parent, i, j)
+
+
+if _NUMBA_AVAILABLE:
+    _find_root = njit(cache=True)(_find_root)
+    _union = njit(cache=True)(_union)
+    _union_similar = njit(cache=True, nogil=True)(_union_similar)
+
+
+def _cluster_uf(sim, threshold) -> np.ndarray:
+    """
+    Find the connected components of a square similarity matrix.
+
+    Rows i and j are connected when sim[i, j] >= threshold. The upper triangle is
+    scanned in compiled code when Numba is installed, otherwise only the matching
+    pairs found by NumPy are merged in Python.
+
+    Args:
+        sim (np.ndarray): Similarity matrix.
+        threshold (int): Minimum similarity for two rows to be connected.
+
+    Returns:
+        np.ndarray: For each row, the smallest row index in its component.
+    """
+    parent = np.arange(sim.shape[0], dtype=np.int32)
+
+    if _NUMBA_AVAILABLE:
+        _union_similar(parent, sim, threshold)
+    else:
+        for i, j in np.argwhere(np.triu(sim >= threshold, k=1)).tolist():
+            _union(parent, i, j)
+
+    return _flatten_roots(parent)
+
+
+def _blocked_roots(strings: list[str], scorer, threshold) -> np.ndarray:
+    """
+    Find groups of similar strings, comparing only strings that share a block.
+
+    Strings are blocked once by their first two characters and once by their third
+    and fourth characters, and a similarity matrix is computed per block. The pairs
+    do not overlap, so a single substituted character leaves one of the keys
+    intact. Matches between strings that differ in both pairs are missed, which
+    keeps the matrices small for very large answer sets.
+
+    Args:
+        strings (list): Strings to group.
+        scorer (callable): RapidFuzz scorer used to compare strings.
+        threshold (int): Minimum similarity for two strings to be connected.
+
+    Returns:
+        np.ndarray: For each string, the smallest index in its group.
+    """
+    parent = np.arange(len(strings), dtype=np.int32)
+
+    for start in (0, 2):
+        blocks = {}
+        for i, s in enumerate(strings):
+            blocks.setdefault(s[start:start + 2], []).append(i)
+
+        for members in blocks.values():
+            if len(members) < 2:
+                continue
+
+            block = [strings[i] for i in members]
+            sim = process.cdist(block, block, scorer=scorer, score_cutoff=threshold, dtype=np.uint8, workers=-1)
+            for member, root in zip(members, _cluster_uf(sim, threshold).tolist()):
+                _union(parent, member, members[root])
+
+    return _flatten_roots(parent)
+
+
+def _flatten_roots(parent: np.ndarray) -> np.ndarray:
+    # Roots are never larger than their children, so pointer jumping settles every row on its root
+    while True:
+        grandparent = parent[parent]
+        if np.array_equal(grandparent, parent):
+            return parent
+        parent = grandparent
+
+
+def _process_answer(answer: str) -> str:
+    """
+    Normalize an answer text for fuzzy matching.
+
+    RapidFuzz's default_process lowercases the text, replaces punctuation with
+    spaces and trims it in C. It runs before NFKD normalization, which would
+    otherwise split accented letters into marks that default_process drops.
+
+    Args:
+        answer (str): The answer text.
+
+    Returns:
+        str: The normalized answer text.
+    """
+    processed = utils.default_process(answer)
+    # NFKD leaves ASCII text unchanged, and most answers are plain ASCII
+    if processed.isascii():
+        return processed
+    return unicodedata.normalize("NFKD", processed)
 
 
 class Answer:
@@ -14,6 +153,8 @@ class Answer:
         answer (str): The answer text.
     """
 
+    __slots__ = ("answer", "answer_id")
+
     def __init__(self, answer: str, answer_id: int = None):
         """
         Initialize the Answer with the provided answer text.
@@ -44,22 +185,33 @@ class Answer:
         return cls(data["answer"], data["answer_id"])
 
 
-class Question(ABC):
+class Question:
     """
-    Abstract base class representing a general question.
+    Base class representing a general question.
+
+    Answers are stored as parallel lists of texts and ids rather than as Answer
+    objects. Reading `answers` builds new Answer objects every time, so changing
+    that list does not change the question. Use `add_answer` to add an answer
+    and assign to `answers` to replace all of them.
 
     Attributes:
         question_text (str): The text of the question.
-        answers (list): A list to store answers to the question.
-        grouped (defaultdict): A dictionary to store grouped answers with their count.
+        answers (list): Answer objects built from the answers to the question.
+        grouped (dict): A dictionary to store grouped answers with their count. Grouping
+            produces a Counter and sorting turns it into a plain dict.
 
     Methods:
-        group() -> dict: Abstract method to group answers, to be implemented in subclasses.
+        group() -> dict: Group answers, to be implemented in subclasses.
         add_answer(answer: str): Add an answer to the question.
         answers() -> list: Return a list of answers for the question.
     """
 
-    def __init__(self, question_text: str, question_type: str, answers: list, grouped: defaultdict = None, question_id: int = None):
+    __slots__ = (
+        "question_text", "question_type", "_answer_texts", "_answer_ids", "_answer_processed",
+        "grouped", "question_id", "counter",
+    )
+
+    def __init__(self, question_text: str, question_type: str, answers: list, grouped: Counter = None, question_id: int = None):
         """
         Initialize the Question with the provided question text and ID.
 
@@ -69,19 +221,76 @@ class Question(ABC):
         self.question_text = question_text
         self.question_type = question_type
         self.answers = answers
-        self.grouped = defaultdict(int, grouped) if grouped else defaultdict(int)
+        self.grouped = Counter(grouped) if grouped else Counter()
         self.question_id = question_id
-        self.counter = 0
 
-    @abstractmethod
+    @property
+    def answers(self) -> list[Answer]:
+        """
+        Get the answers to the question as Answer objects.
+
+        Returns:
+            list: Newly built Answer objects, changing them does not affect the question.
+        """
+        return [Answer(text, answer_id) for text, answer_id in zip(self._answer_texts, self._answer_ids)]
+
+    @answers.setter
+    def answers(self, answers: list):
+        """
+        Replace all answers to the question.
+
+        Args:
+            answers (list): Answer objects or answer texts, they get ids in list order.
+        """
+        self._answer_texts: list[str] = [sys.intern(str(a)) for a in answers]
+        self._answer_ids = array("i", range(len(self._answer_texts)))
+        self._answer_processed: list[str] = []  # Filled lazily by get_processed_answers
+        self.counter = len(self._answer_texts)
+
+    def copy(self):
+        """
+        Copy the question so it can be grouped while answers keep being added to this one.
+
+        Returns:
+            Question: A copy with its own answer lists, everything else is shared.
+        """
+        question = copy.copy(self)
+        question._answer_texts = self._answer_texts.copy()
+        question._answer_ids = array("i", self._answer_ids)
+        question._answer_processed = self._answer_processed.copy()
+        return question
+
+    def update_grouping(self, grouped_copy: "Question") -> bool:
+        """
+        Take over the grouping of a copy made by `copy`.
+
+        Answers added since the copy was made are grouped the next time. Nothing is
+        taken over when the answers were replaced in the meantime.
+
+        Args:
+            grouped_copy (Question): The grouped copy.
+
+        Returns:
+            bool: Whether the grouping was taken over.
+        """
+        texts = grouped_copy._answer_texts
+        if self._answer_texts[:len(texts)] != texts:
+            return False
+
+        self.grouped = grouped_copy.grouped
+        # The copy's normalized answers are a prefix of this question's answers
+        if len(grouped_copy._answer_processed) > len(self._answer_processed):
+            self._answer_processed = grouped_copy._answer_processed
+        return True
+
     def group(self):
         """
-        Abstract method to group answers based on specific logic.
+        Group answers based on specific logic.
 
-        This method should be implemented by subclasses to group answers
+        This method must be implemented by subclasses to group answers
         according to the needs of the question type.
         """
-        pass
+        raise NotImplementedError
 
     def add_answer(self, answer: str):
         """
@@ -90,7 +299,9 @@ class Question(ABC):
         Args:
             answer (str): The answer text to be added.
         """
-        self.answers.append(Answer(answer=answer, answer_id=self.counter))
+        # Interned so equal answers share one object and dict lookups while grouping hit on identity
+        self._answer_texts.append(sys.intern(str(answer)))
+        self._answer_ids.append(self.counter)
         self.counter += 1
 
     def get_answers(self) -> list[str]:
@@ -100,13 +311,47 @@ class Question(ABC):
         Returns:
             list: A list of answer texts.
         """
-        return [str(a) for a in self.answers]
+        return self._answer_texts.copy()
+
+    def get_processed_answers(self, start: int = 0) -> list[str]:
+        """
+        Get the answers normalized for fuzzy matching.
 
-    def sort_grouped_answers(self):
+        Normalized texts are computed once per answer and kept until the answers
+        are replaced.
+
+        Args:
+            start (int): Index of the first answer to return.
+
+        Returns:
+            list: A list of normalized answer texts.
         """
-        Sort the grouped answers
+        processed = self._answer_processed
+        if len(processed) < len(self._answer_texts):
+            processed.extend(map(_process_answer, self._answer_texts[len(processed):]))
+        return processed[start:]
+
+    def sort_grouped_answers(self, top_k: int = None):
         """
-        self.grouped = defaultdict(int, sorted(self.grouped.items(), key=lambda item: item[1], reverse=True))
+        Sort the grouped answers by count, highest first.
+
+        The result is a plain dict, which keeps insertion order, so the sorted groups
+        are not copied into another Counter.
+
+        Args:
+            top_k (int): Keep only this many groups with the highest counts, all groups are kept if None.
+        """
+        if not self.grouped:
+            return
+
+        if top_k is None:
+            keys = np.array(list(self.grouped), dtype=object)
+            counts = np.fromiter(self.grouped.values(), dtype=np.int64, count=len(keys))
+            # A stable sort keeps groups with equal counts in their current order
+            order = np.argsort(-counts, kind="stable")
+            self.grouped = dict(zip(keys[order].tolist(), counts[order].tolist()))
+        else:
+            self.grouped = dict(heapq.nlargest(top_k, self.grouped.items(), key=itemgetter(1)))
 
 
 class MultiChoiceQuestion(Question):
@@ -120,7 +365,9 @@ class MultiChoiceQuestion(Question):
         group() -> dict: Group answers based on their frequency and return the result.
     """
 
-    grouped: defaultdict
+    __slots__ = ("possible_answers", "_max_id")
+
+    grouped: dict[str, int]
 
     def __init__(self, question_text: str, answers: list, grouped = None, possible_answers: {} = None, question_id: int = None):
         """
@@ -131,6 +378,8 @@ class MultiChoiceQuestion(Question):
         """
         super().__init__(question_text,"multi", answers, grouped, question_id)
         self.possible_answers = possible_answers if possible_answers else {}
+        # Stored keys come back from JSON as strings, so compare them as numbers
+        self._max_id = max(map(int, self.possible_answers), default=0)
 
     def group(self):
         """
@@ -139,18 +388,18 @@ class MultiChoiceQuestion(Question):
         Returns:
             dict: A dictionary with answers as keys and their counts as values.
         """
-        self.grouped = defaultdict(int)
-        for answer in self.answers:
-            self.grouped[str(answer)] += 1
+        self.grouped = Counter(self._answer_texts)
 
     def add_possible_answer(self, answer: str, counter: int):
         self.possible_answers[counter] = Answer(answer=answer, answer_id=counter)
+        self._max_id = max(self._max_id, counter)
 
     def remove_possible_answers(self):
         self.possible_answers = {}
+        self._max_id = 0
 
     def get_highest_id(self) -> int:
-        return max(self.possible_answers.keys()) if len(self.possible_answers.keys()) > 0 else 0
+        return self._max_id
 
     def to_dict(self) -> dict:
         """
@@ -171,8 +420,8 @@ class MultiChoiceQuestion(Question):
         # Convert a dictionary back to the class instance
         return cls(
             data["question_text"],
-            [Answer(answer) for answer in data["answers"]],
-            defaultdict(int, data["grouped"]),
+            data["answers"],
+            Counter(data["grouped"]),
             {key: Answer(value, key) for key, value in data["possible_answers"].items()},
             data["id"],
         )
@@ -189,6 +438,8 @@ class StringQuestion(Question):
         group(threshold=80) -> dict: Group similar answers using fuzzy matching.
     """
 
+    __slots__ = ("_cached_key", "_cluster_state")
+
     def __init__(self, question_text: str, answers: list, grouped = None, question_id: int = None):
         """
         Initialize the String Question with the provided question text and ID.
@@ -197,41 +448,176 @@ class StringQuestion(Question):
             question_text (str): The text of the question.
         """
         super().__init__(question_text, "string", answers, grouped, question_id)
+        self._cached_key = None  # Inputs of the last group() call, used to skip identical reruns
+        self._cluster_state = None  # Clusters of the last group() call, reused when answers are only appended
 
-    def group(self, threshold=85, case_sensitive=False):
-        clusters = {}  # Maps original keys to their counts
-        processed_keys = {}  # Maps original keys to their processed versions (e.g., lowercase)
+    def add_answer(self, answer: str):
+        super().add_answer(answer)
+        self._cached_key = None
+
+    def update_grouping(self, grouped_copy: "StringQuestion") -> bool:
+        if not super().update_grouping(grouped_copy):
+            return False
+        # The key holds the number and hash of the grouped answers, so it misses once answers were added
+        self._cluster_state = grouped_copy._cluster_state
+        self._cached_key = grouped_copy._cached_key
+        return True
+
+    def group(self, threshold=85, case_sensitive=False, scorer=fuzz.ratio):
+        """
+        Group similar answers using fuzzy matching.
+
+        All pairwise similarities are computed in a single batched `process.cdist`
+        call and answers that match are merged with a union-find sweep over the
+        resulting matrix, so two answers end up in the same group whenever a chain
+        of matching answers connects them. Each group is keyed by its first answer.
+        Calling it again with the same answers and arguments reuses the previous
+        clusters, and when answers were only appended since the last call, just the
+        new ones are compared and merged into the existing union-find. Both ways
+        give the same groups.
 
+        Args:
+            threshold (int): Minimum similarity score for two answers to be grouped.
+            case_sensitive (bool): Whether to compare answers without lowercasing them.
+            scorer (callable): RapidFuzz scorer used to compare answers. The default
+                fuzz.ratio uses the bit-parallel Indel kernel, which handles answers of up
+                to 64 characters in a single machine word. Pass fuzz.WRatio or
+                fuzz.token_set_ratio when word order and partial matches should count.
+        """
         data = self.get_answers()
 
-        self.grouped = defaultdict(int)
+        key = (threshold, case_sensitive, scorer, len(data), hash(tuple(data)))
+        if key != self._cached_key:
+            if not self._group_new_answers(data, threshold, case_sensitive, scorer):
+                self._group_all_answers(data, threshold, case_sensitive, scorer)
+            self._cached_key = key
 
-        for s in data:
-            processed_s = s if case_sensitive else s.lower()
+        # Rebuilt even when the clusters are unchanged, sorting may have cut grouped down to the top groups
+        self.grouped = self._grouped_from_state()
+
+    def _processed_answers(self, start: int, case_sensitive: bool) -> list[str]:
+        if case_sensitive:
+            return self._answer_texts[start:]
+        return self.get_processed_answers(start)
+
+    def _grouped_from_state(self) -> Counter:
+        """
+        Count the answers of every group in `_cluster_state`, keyed by the first answer of the group.
+        """
+        unique, _, first_seen, slot_counts, roots, seen, _ = self._cluster_state
+        if not unique:
+            return Counter()
+
+        counts = np.zeros(len(unique), dtype=np.int64)
+        np.add.at(counts, roots, slot_counts)
+        # Only roots have answers counted on them, and roots in ascending order follow first appearance
+        first = np.flatnonzero(counts)
+        return Counter(dict(zip((seen[first_seen[u]] for u in first.tolist()), counts[first].tolist())))
+
+    def _group_all_answers(self, data: list[str], threshold: int, case_sensitive: bool, scorer):
+        """
+        Cluster all answers from scratch and store the result in `_cluster_state`.
 
-            if not clusters:
-                clusters[s] = 1
-                processed_keys[s] = processed_s
+        The state holds the distinct processed answers in order of first appearance,
+        a dict from each of them to its slot, the index of each one's first answer,
+        the number of answers per slot, the union-find root of every slot, the
+        answers it was built from and the settings used.
+        """
+        processed = self._processed_answers(0, case_sensitive)
+
+        # Identical answers always end up in the same group, so only distinct ones are compared.
+        # dict.fromkeys deduplicates in order of first appearance without a Python level loop
+        unique = list(dict.fromkeys(processed))
+        unique_slots = {p: slot for slot, p in enumerate(unique)}
+        labels = np.array(list(map(unique_slots.__getitem__, processed)), dtype=np.intp)  # Slot of every answer
+        # Index of the first answer of every distinct processed answer
+        first_seen = np.full(len(unique), len(processed))
+        np.minimum.at(first_seen, labels, np.arange(len(processed)))
+        slot_counts = np.bincount(labels, minlength=len(unique)).tolist()
+
+        if len(unique) < 2:
+            roots = np.arange(len(unique), dtype=np.int32)
+        elif len(unique) >= _BLOCKING_MIN_ANSWERS:
+            roots = _blocked_roots(unique, scorer, threshold)
+        else:
+            # With score_cutoff set, the Indel based fuzz.ratio skips pairs whose length
+            # difference alone rules out reaching the threshold. Sorting by length groups
+            # those pairs into contiguous runs of each row
+            order = np.argsort(np.fromiter(map(len, unique), dtype=np.int32, count=len(unique)), kind="stable")
+            by_length = [unique[i] for i in order.tolist()]
+            sim = process.cdist(
+                by_length,
+                by_length,
+                scorer=scorer,
+                score_cutoff=threshold,
+                dtype=np.uint8,
+                workers=-1
+            )
+            sorted_roots = _cluster_uf(sim, threshold)
+
+            # Map components back to unique order, rooted at their first distinct answer
+            first_index = np.full(len(unique), len(unique), dtype=np.int64)
+            np.minimum.at(first_index, sorted_roots, order)
+            roots = np.empty(len(unique), dtype=np.int32)
+            roots[order] = first_index[sorted_roots]
+
+        self._cluster_state = (
+            unique, unique_slots, first_seen.tolist(), slot_counts, roots, tuple(data), (threshold, case_sensitive, scorer)
+        )
+
+    def _group_new_answers(self, data: list[str], threshold: int, case_sensitive: bool, scorer) -> bool:
+        """
+        Merge answers appended since the last grouping into the existing union-find.
+
+        New distinct answers are compared with every distinct answer in one cdist
+        call and joined with all of them that reach the threshold, exactly as a
+        grouping from scratch would. This only applies when the previously grouped
+        answers are an unchanged prefix of the current ones and the settings are the
+        same.
+
+        Returns:
+            bool: False if the answers have to be grouped from scratch instead.
+        """
+        if self._cluster_state is None:
+            return False
+
+        unique, unique_slots, first_seen, slot_counts, roots, seen, settings = self._cluster_state
+        n_seen = len(seen)
+        if settings != (threshold, case_sensitive, scorer) or len(data) < n_seen or tuple(data[:n_seen]) != seen:
+            return False
+
+        # Built as new objects, the previous state is left as it was
+        unique, unique_slots, first_seen, slot_counts = unique.copy(), unique_slots.copy(), first_seen.copy(), slot_counts.copy()
+        for i, p in enumerate(self._processed_answers(n_seen, case_sensitive), n_seen):
+            slot = unique_slots.setdefault(p, len(unique))
+            if slot == len(unique):
+                unique.append(p)
+                first_seen.append(i)
+                slot_counts.append(1)
             else:
-                processed_choices = list(processed_keys.values())
-                original_choices = list(processed_keys.keys())
-
-                best_match = process.extractOne(
-                    processed_s,
-                    processed_choices,
-                    scorer=fuzz.WRatio,
-                    score_cutoff=threshold
-                )
-
-                if best_match:
-                    matched_index = best_match[2]
-                    matched_original_key = original_choices[matched_index]
-                    clusters[matched_original_key] += 1
-                else:
-                    clusters[s] = 1
-                    processed_keys[s] = processed_s
-
-        self.grouped = defaultdict(int, clusters)
+                slot_counts[slot] += 1
+
+        # Large sets are only compared within blocks, which the full grouping has to do
+        if len(unique) >= _BLOCKING_MIN_ANSWERS:
+            return False
+
+        n_old = len(roots)
+        if len(unique) > n_old:
+            parent = np.concatenate((roots, np.arange(n_old, len(unique), dtype=np.int32)))
+            sim = process.cdist(
+                unique[n_old:],
+                unique,
+                scorer=scorer,
+                score_cutoff=threshold,
+                dtype=np.uint8,
+                workers=-1
+            )
+            for i, j in np.argwhere(sim >= threshold).tolist():
+                _union(parent, n_old + i, j)
+            roots = _flatten_roots(parent)
+
+        self._cluster_state = (unique, unique_slots, first_seen, slot_counts, roots, tuple(data), settings)
+        return True
 
     def manual_group_fix(self, group_name: str, answers: list[str]):
         """
@@ -239,7 +625,7 @@ class StringQuestion(Question):
 
         This method increments the count of a specified group by the number of answers
         in the provided list. Additionally, any answers that belong to the specified group
-        are removed from the grouped dictionary.
+        are removed from the grouped dictionary, except the group itself.
 
         Args:
             group_name (str): The name of the group to be adjusted.
@@ -248,12 +634,11 @@ class StringQuestion(Question):
         Example:
             manual_group_fix("Group A", ["Answer 1", "Answer 2"])
         """
+        self._cached_key = None
+        answers_set = frozenset(answers)
+        self.grouped = Counter({k: v for k, v in self.grouped.items() if k not in answers_set or k == group_name})
         self.grouped[group_name] += len(answers)
 
-        for key in self.grouped.keys():
-            if key in answers:
-                self.grouped.pop(key)
-
     def manual_group(self, groups: dict[str, int]):
         """
         Manually set the groups for the answers.
@@ -267,7 +652,8 @@ class StringQuestion(Question):
         Example:
             manual_group({"Group A": 5, "Group B": 3})
         """
-        self.grouped = groups
+        self._cached_key = None
+        self.grouped = Counter(groups)
 
     def to_dict(self) -> dict:
         """
@@ -278,7 +664,7 @@ class StringQuestion(Question):
             "question_text": self.question_text,
             "type": self.question_type,
             "answers": self.get_answers(),
-            "grouped": defaultdict(int, self.grouped),
+            "grouped": dict(self.grouped),
             "id": self.question_id,
         }
 
@@ -287,12 +673,15 @@ class StringQuestion(Question):
         # Convert a dictionary back to the class instance
         return cls(
             data["question_text"],
-            [Answer(answer) for answer in data["answers"]],
-            defaultdict(int, data["grouped"]),
+            data["answers"],
+            Counter(data["grouped"]),
             data["id"],
         )
 
 
+_TYPES = {"multi": MultiChoiceQuestion, "string": StringQuestion}  # Question class for each type name
+
+
 class Questions:
     """
     A class for managing a collection of questions.
@@ -310,6 +699,10 @@ class Questions:
         Initialize the Questions collection with an empty list and a counter set to 0.
         """
         self.questions = questions_list if questions_list else {}
+        self._text_index: dict[str, int] = {}  # Maps question text to the id of its first question
+        self._max_id = max(self.questions, default=0)  # Not lowered on removal so ids are never reused
+        for question_id, question in self.questions.items():
+            self._text_index.setdefault(question.question_text, question_id)
 
     def add_question(self, question: str, type_: [str], question_id: int = None, possible_answers: dict = None):
         """
@@ -322,56 +715,95 @@ class Questions:
         Raises:
             Exception: If the question type is unknown.
         """
-        if type_ == "string":
-            self.questions[question_id] = (StringQuestion(question, [], question_id=question_id))
-        elif type_ == "multi":
-            self.questions[question_id] = (MultiChoiceQuestion(question, [], question_id=question_id, possible_answers=possible_answers))
-        else:
+        question_class = _TYPES.get(type_)
+        if question_class is None:
             raise Exception(f"Unknown question type: {type_}")
 
+        # Only multiple choice questions take possible answers
+        extra = {"possible_answers": possible_answers} if possible_answers is not None else {}
+        self.questions[question_id] = question_class(question, [], question_id=question_id, **extra)
+
+        self._text_index.setdefault(question, question_id)
+        if question_id is not None:
+            self._max_id = max(self._max_id, question_id)
+
     def remove_question(self, question_id: int):
-        del self.questions[question_id]
+        question = self.questions.pop(question_id)
+        if self._text_index.get(question.question_text) == question_id:
+            del self._text_index[question.question_text]
+
+    def rename_question(self, question_id: int, question_text: str):
+        """
+        Change the text of a question and keep the text lookup index in sync.
+
+        Args:
+            question_id (int): The id of the question to rename.
+            question_text (str): The new text of the question.
+        """
+        question = self.questions[question_id]
+        if self._text_index.get(question.question_text) == question_id:
+            del self._text_index[question.question_text]
+        question.question_text = question_text
+        self._text_index.setdefault(question_text, question_id)
 
     def get_questions_text(self) -> list[str]:
         return [question.question_text for question in self.questions.values()]
 
     def group_all_questions(self):
-        for question in self.questions.values():
-            question.group()
+        """
+        Group the answers of every question.
 
-    def group_and_sort_all_questions(self):
+        String questions are grouped in parallel threads, RapidFuzz and the compiled
+        union-find release the GIL while they work. Multiple choice questions only
+        count answers, so they are grouped inline.
+        """
+        string_questions = []
         for question in self.questions.values():
-            question.group()
-            question.sort_grouped_answers()
+            if isinstance(question, StringQuestion):
+                string_questions.append(question)
+            else:
+                question.group()
+
+        if len(string_questions) > 1:
+            with ThreadPoolExecutor() as executor:
+                list(executor.map(StringQuestion.group, string_questions))
+        elif string_questions:
+            string_questions[0].group()
 
-    def sort_all_questions(self):
+    def group_and_sort_all_questions(self, top_k: int = None):
+        self.group_all_questions()
+        self.sort_all_questions(top_k)
+
+    def sort_all_questions(self, top_k: int = None):
         for question in self.questions.values():
-            question.sort_grouped_answers()
+            question.sort_grouped_answers(top_k)
 
     def randomise(self) -> list:
         """
         Return a shuffled list of questions.
 
+        The list is new, but the questions in it are the same objects as in the
+        collection, so changes made to them are visible in the collection too.
+
         Returns:
             list: A shuffled list of questions.
         """
-        copied_list = deepcopy(self.questions)
-        shuffle(copied_list)
-        return copied_list
+        questions = list(self.questions.values())
+        shuffle(questions)
+        return questions
 
     def get_question_by_text(self, question_text: str) -> Question:
-        for question in self.questions:
-            if question.question_text == question_text:
-                return question
+        question_id = self._text_index.get(question_text)
+        return self.questions[question_id] if question_id is not None else None
 
     def get_question_by_id(self, question_id: int) -> Question:
         return self.questions[question_id]
 
     def get_id_by_text(self, question_text: str) -> int:
-        return next((k for k, v in self.questions.items() if v.question_text == question_text), None)
+        return self._text_index.get(question_text)
 
     def get_highest_id(self) -> int:
-        return max(self.questions.keys()) if len(self.questions.keys()) > 0 else 0
+        return self._max_id
 
     def to_dict(self):
         # Convert class instance to a dictionary
@@ -382,13 +814,9 @@ class Questions:
     @classmethod
     def from_dict(cls, data):
         # Convert a dictionary back to the class instance
-        questions_list = {}
-        for q_data in data["questions"].values():
-            if q_data["type"] == "multi":
-                questions_list[x.question_id] = (x:=MultiChoiceQuestion.from_dict(q_data))
-            elif q_data["type"] == "string":
-                questions_list[x.question_id] = (x:=StringQuestion.from_dict(q_data))
-            else:
+        questions_data = data["questions"].values()
+        for q_data in questions_data:
+            if q_data["type"] not in _TYPES:
                 raise ValueError(f"Unknown question type: {q_data['type']}")
 
-        return cls(questions_list)
+        return cls({q_data["id"]: _TYPES[q_data["type"]].from_dict(q_data) for q_data in questions_data})
@@ -1,47 +1,190 @@
+import atexit
+import os
+import threading
+import time
+from collections import Counter
+
+import orjson
 import tinydb
-from tinydb import Query
-from Question import *
+from tinydb.middlewares import CachingMiddleware
+from Question import MultiChoiceQuestion, Questions
+
+
+class OrjsonStorage(tinydb.storages.Storage):
+    """
+    TinyDB storage that keeps the database in a JSON file encoded with orjson.
+
+    orjson encodes several times faster than the standard json module TinyDB uses by
+    default and writes bytes directly, so nothing has to be encoded a second time.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        # Create the file if it is missing, like TinyDB's JSONStorage does
+        with open(path, "ab"):
+            pass
+
+    def read(self):
+        with open(self._path, "rb") as f:
+            data = f.read()
+        return orjson.loads(data) if data else None
+
+    def write(self, data):
+        # Write a temporary file and swap it in, so a crash mid-write never leaves a truncated database
+        tmp_path = self._path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._path)
+
 
 class Storage:
+    # Changes made within this many seconds of the first unsaved one are written together
+    WRITE_DELAY = 0.1
+
     def __init__(self, file):
-        self.db = tinydb.TinyDB(file)
-        self.questions_dict = self.get_questions_dict()
+        # The middleware keeps the last database state in memory, so updates do not read the file back
+        self.db = tinydb.TinyDB(file, storage=CachingMiddleware(OrjsonStorage))
+        # A single read, len() followed by all() would load and parse the file twice
+        documents = self.db.all()
+        self._has_document = bool(documents)  # Whether there is a questions document to update
+        self.questions_dict = documents[0]["questions"] if documents else {}
 
         self.questions = Questions.from_dict({"questions": self.questions_dict})
         self.counter = self.questions.get_highest_id() + 1
 
+        # Guards the in-memory questions against being written while they are changed
+        self._lock = threading.RLock()
+        self._write_timer = None
+        atexit.register(self.flush)
+
+        # Serialized questions as last written, only changed questions are serialized again
+        self._question_docs = {}
+        self._changed_ids = set(self.questions.questions)
+
+        self._rendered = {}  # Pages rendered from the questions, by name
+        self._answer_pages = set()  # Names of rendered pages that show answers or groups
+        self._questions_view = None
+        self._form_view = None
+        self.last_mutation_time = time.time()  # Wall clock time of the last change, for Last-Modified
+
+    def invalidate(self, answers_only: bool = False):
+        """
+        Drop everything rendered from the questions, called whenever they change.
+
+        Args:
+            answers_only (bool): Only answers or groups changed, so only pages that show them are dropped.
+        """
+        with self._lock:
+            if answers_only:
+                for name in self._answer_pages:
+                    self._rendered.pop(name, None)
+                return
+
+            self._rendered.clear()
+            self._questions_view = None
+            self._form_view = None
+
+    def get_rendered(self, name: str, render, shows_answers: bool = False):
+        """
+        Get a page rendered from the questions.
+
+        Args:
+            name (str): Name the rendered page is cached under.
+            render: Called without arguments to render the page when nothing is cached.
+            shows_answers (bool): Whether the page shows answers or groups and has to be
+                rendered again when they change.
+
+        Returns:
+            The value returned by `render`, reused until the questions change.
+        """
+        # Cache hits skip the lock, the cache is only filled and cleared while holding it
+        page = self._rendered.get(name)
+        if page is not None:
+            return page
+
+        with self._lock:
+            if shows_answers:
+                self._answer_pages.add(name)
+            page = self._rendered.get(name)
+            if page is None:
+                page = self._rendered[name] = render()
+            return page
+
+    def _persist(self, question_id: int = None, answers_only: bool = False):
+        """
+        Schedule the questions to be written to the database.
+
+        The first change starts a short timer and all changes made before it fires
+        are written in a single database update.
+
+        Args:
+            question_id (int): The question that changed, all questions if None.
+            answers_only (bool): Only answers or groups changed, the questions themselves did not.
+        """
+        with self._lock:
+            if question_id is None:
+                self._changed_ids.update(self.questions.questions)
+            else:
+                self._changed_ids.add(question_id)
+            self.last_mutation_time = time.time()
+            self.invalidate(answers_only)
+            if self._write_timer is None:
+                self._write_timer = threading.Timer(self.WRITE_DELAY, self.flush)
+                self._write_timer.daemon = True
+                self._write_timer.start()
+
+    def flush(self):
+        """
+        Write pending changes to the database right away.
+        """
+        with self._lock:
+            if self._write_timer is None:
+                return
+            self._write_timer.cancel()
+            self._write_timer = None
+
+            questions = self.questions.questions
+            docs = self._question_docs
+            for question_id in self._changed_ids:
+                if question_id in questions:
+                    docs[question_id] = questions[question_id].to_dict()
+            self._changed_ids.clear()
+            # Saved in question order, the game pages pick questions by their position
+            self._question_docs = {question_id: docs[question_id] for question_id in questions}
+
+            if self._has_document:
+                self.db.update({"questions": self._question_docs}, doc_ids=[1])
+            else:
+                self.db.insert({"questions": self._question_docs})
+                self._has_document = True
+            self.db.storage.flush()
+
     def create(self, data):
-        self.db.insert(data)
+        with self._lock:
+            self.db.insert(data)
+            self._has_document = True
+            # The caching middleware only keeps the insert in memory until it is flushed
+            self.db.storage.flush()
 
-    def add_question(self, question_text, question_type, possible_answers: dict = None):
-        if question_type == "string":
-            # Add the new question to the questions list
-            self.questions.add_question(question_text, question_type, question_id=self.counter)
+    def add_question(self, question_text, question_type, possible_answers: dict = None) -> bool:
+        with self._lock:
+            # Question texts are indexed, so duplicates are found without scanning the questions
+            if self.questions.get_id_by_text(question_text) is not None:
+                return False
 
-        else:
             # Add the new question to the questions list
             self.questions.add_question(question_text, question_type, question_id=self.counter, possible_answers=possible_answers)
 
-        if len(self.db) > 0:
-            self.db.update(self.questions.to_dict(), doc_ids=[1])
-        else:
-            self.db.insert(self.questions.to_dict())
-        self.counter += 1
+            self._persist(self.counter)
+            self.counter += 1
+            return True
 
     def delete_question(self, question_id: int):
-        question_id = int(question_id)
-
-        # Get the main document with doc_id=1
-        entry = self.db.get(doc_id=1)
-
-        if entry and "questions" in entry:
-            # Filter out the question with the given ID
-            updated_questions = {int(k): v for k, v in entry["questions"].items() if int(k) != question_id}
-            # Update the database with the modified questions list
-            self.db.update({"questions": updated_questions}, doc_ids=[1])
-
-        # Remove from class
-        self.questions.remove_question(question_id)
+        with self._lock:
+            self.questions.remove_question(int(question_id))
+            self._persist(int(question_id))
 
     def get_question(self, question_id: int):
         return self.questions.get_question_by_id(question_id)
@@ -49,41 +192,121 @@ class Storage:
     def get_questions(self):
         return self.questions.questions
 
+    def get_questions_list(self) -> tuple:
+        """
+        Get the questions in order as a tuple that is reused until they change.
+        """
+        view = self._questions_view
+        if view is not None:
+            return view
+
+        with self._lock:
+            if self._questions_view is None:
+                self._questions_view = tuple(self.questions.questions.values())
+            return self._questions_view
+
+    def get_question_by_index(self, index: int):
+        """
+        Get the question at a position in the question order, as used by the game pages.
+        """
+        return self.get_questions_list()[index]
+
+    def get_form_questions(self) -> tuple:
+        """
+        Get the fields of each question that the answer form shows, as plain dicts.
+
+        Templates read dict keys faster than attributes and properties of the question
+        objects. The tuple is reused until the questions change.
+        """
+        view = self._form_view
+        if view is not None:
+            return view
+
+        with self._lock:
+            if self._form_view is None:
+                self._form_view = tuple(
+                    {
+                        "id": question.question_id,
+                        "text": question.question_text,
+                        "type": question.question_type,
+                        "possible_answers": tuple(map(str, question.possible_answers.values()))
+                        if question.question_type == "multi" else (),
+                    }
+                    for question in self.questions.questions.values()
+                )
+            return self._form_view
+
+    def group_and_sort_all_questions(self):
+        """
+        Group and sort the answers of every question.
+
+        The grouping runs on copies of the questions without holding the lock, so
+        pages are served and answers are added meanwhile. The lock is only taken to
+        copy the questions and to apply the results.
+        """
+        with self._lock:
+            copies = Questions({question_id: question.copy() for question_id, question in self.questions.questions.items()})
+
+        copies.group_and_sort_all_questions()
+
+        with self._lock:
+            questions = self.questions.questions
+            for question_id, grouped_copy in copies.questions.items():
+                # Questions deleted or reset while grouping keep their current state
+                question = questions.get(question_id)
+                if question is not None and question.update_grouping(grouped_copy):
+                    self._persist(question_id, answers_only=True)
+
     def add_possible_answer(self, question_id, answer):
-        pos = self.questions.get_question_by_id(question_id)
-        pos.add_possible_answer(answer, pos.get_highest_id() + 1)
-        # todo: insert into db new pos answer
-
-    def edit_question(self, question_id: int, question_text: str, question_type: str, possible_answers: list = None):
-        question = self.questions.get_question_by_id(question_id)
-        question.question_text = question_text
-        question.type = question_type
-
-        Question_query = Query()
-        if question_type == "multi":
-            pos_ans = {}
-            question: MultiChoiceQuestion = question
-            question.remove_possible_answers()
-            for i, possible_answer in enumerate(possible_answers):
-                question.add_possible_answer(possible_answer, i)
-                pos_ans[i] = possible_answer
-
-        self.db.update(self.questions.to_dict(), doc_ids=[1])
+        with self._lock:
+            pos = self.questions.get_question_by_id(question_id)
+            pos.add_possible_answer(answer, pos.get_highest_id() + 1)
+            self._persist(question_id)
+
+    def edit_question(self, question_id: int, question_text: str, question_type: str, possible_answers: list = None) -> bool:
+        with self._lock:
+            question = self.questions.get_question_by_id(question_id)
+            # Renaming to the text of another question would make it a duplicate
+            if question_text != question.question_text and self.questions.get_id_by_text(question_text) is not None:
+                return False
+
+            self.questions.rename_question(question_id, question_text)
+
+            if question_type == "multi":
+                question: MultiChoiceQuestion = question
+                question.remove_possible_answers()
+                for i, possible_answer in enumerate(possible_answers):
+                    question.add_possible_answer(possible_answer, i)
+
+            self._persist(question_id)
+            return True
 
     def get_questions_dict(self):
-        if len(self.db) > 0:
-            return self.db.all()[0]["questions"]
-        else:
-            return {}
+        documents = self.db.all()
+        return documents[0]["questions"] if documents else {}
 
     def add_answer(self, question_id, answer):
-        self.questions.get_question_by_id(question_id).add_answer(answer)
-        self.db.update(self.questions.to_dict(), doc_ids=[1])
+        with self._lock:
+            self.questions.get_question_by_id(question_id).add_answer(answer)
+            self._persist(question_id, answers_only=True)
+
+    def add_answers(self, answers: list[tuple[int, str]]):
+        """
+        Add several answers and save them together.
+
+        Args:
+            answers (list): Pairs of a question id and the answer given to that question.
+        """
+        with self._lock:
+            for question_id, answer in answers:
+                self.questions.get_question_by_id(question_id).add_answer(answer)
+                self._persist(question_id, answers_only=True)
 
     def delete_answers(self, question_id: int):
-        self.questions.get_question_by_id(question_id).answers = []
-        self.questions.get_question_by_id(question_id).grouped = defaultdict(int)
-        self.db.update(self.questions.to_dict(), doc_ids=[1])
+        with self._lock:
+            self.questions.get_question_by_id(question_id).answers = []
+            self.questions.get_question_by_id(question_id).grouped = Counter()
+            self._persist(question_id, answers_only=True)
 
 
 
@@ -1,17 +1,62 @@
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
 from flask import Flask, jsonify, render_template, request, redirect, url_for, make_response
-from Question import *
 from Storage import Storage
 
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
 app = Flask(__name__)
+if Compress is not None:
+    # Compresses HTML and JSON responses for clients that accept gzip or brotli
+    Compress(app)
 
 file_location = "questions_taa.json"
 
+ANSWERED_MESSAGE = "odgovoru si"
+DUPLICATE_QUESTION_MESSAGE = "A question with this text already exists."
+
+USERS = ("Matic", "Tilen", "Nik", "Timotej", "Aljaž", "Julija", "Tinkara M", "Miha", "Pia", "Agata", "Urška",
+         "Anuša", "Tinkara R", "Žiga", "Doroteja", "Gabrijel")
+
 storage = Storage(file_location)
 
+# Grouping runs in the background, one run at a time, so the admin page answers right away
+grouping_executor = ThreadPoolExecutor(max_workers=1)
+grouping_lock = threading.Lock()
+grouping_future = None
+
+
+def render_questions():
+    html = render_template('questions.html', questions=storage.get_questions_list())
+    return html, hashlib.blake2b(html.encode(), digest_size=8).hexdigest()
 
 @app.route('/admin/questions')
 def manage_questions():
-    return render_template('questions.html', questions=list(storage.get_questions().values()))
+    html, etag = storage.get_rendered('questions', render_questions)
+    resp = make_response(html)
+    resp.set_etag(etag)
+    resp.last_modified = storage.last_mutation_time
+    resp.headers['Cache-Control'] = 'private, no-cache'
+    return resp.make_conditional(request)
+
+def render_questions_json():
+    blob = orjson.dumps(storage.questions.to_dict(), option=orjson.OPT_NON_STR_KEYS)
+    return blob, hashlib.blake2b(blob, digest_size=8).hexdigest()
+
+@app.route('/admin/questions.json')
+def questions_json():
+    blob, etag = storage.get_rendered('questions.json', render_questions_json, shows_answers=True)
+    resp = make_response(blob)
+    resp.mimetype = 'application/json'
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp.make_conditional(request)
 
 @app.route('/admin/questions/delete/<int:question_id>', methods=['GET'])
 def delete_question(question_id):
@@ -31,45 +76,56 @@ def edit_question_redirect(question_id):
     question = request.args.get('question')
     type_ = request.args.get('type')
     if type_ is None: # string
-        storage.edit_question(question_id, question, "string")
+        edited = storage.edit_question(question_id, question, "string")
     else: # multi
         pos_answers = [value for key, value in request.args.items() if key.startswith('pos_ans')]
-        storage.edit_question(question_id, question, "multi", pos_answers)
+        edited = storage.edit_question(question_id, question, "multi", pos_answers)
+    if not edited:
+        return DUPLICATE_QUESTION_MESSAGE, 409
     return redirect(url_for('manage_questions'))
 
 
 @app.route('/admin/questions/add/', methods=['GET'])
 def add_question():
-    users = ["Matic", "Tilen", "Nik", "Timotej", "Aljaž", "Julija", "Tinkara M", "Miha", "Pia", "Agata", "Urška",
-             "Anuša", "Tinkara R", "Žiga", "Doroteja", "Gabrijel"]
-
-    return render_template('addQuestion.html', users=users)
+    return render_template('addQuestion.html', users=USERS)
 
 @app.route('/admin/questions/add/redirect/', methods=['GET'])
 def add_question_redirect():
     question = request.args.get('question')
     type_ = request.args.get('type')
     if type_ is None:  # string
-        storage.add_question(question, "string")
+        added = storage.add_question(question, "string")
     else:  # multi
-        pos_answers = {i: value for i, [key, value] in enumerate(request.args.items()) if key.startswith('pos_ans')}
-        storage.add_question(question, "multi", pos_answers)
+        # Number the possible answers themselves, not their position among all form fields
+        pos_answers = dict(enumerate(value for key, value in request.args.items() if key.startswith('pos_ans')))
+        added = storage.add_question(question, "multi", pos_answers)
+    if not added:
+        return DUPLICATE_QUESTION_MESSAGE, 409
     return redirect(url_for('manage_questions'))
 
 
+def render_index():
+    html = render_template('answers.html', questions=storage.get_form_questions())
+    return html, hashlib.blake2b(html.encode(), digest_size=8).hexdigest()
+
 @app.route('/', methods=['GET'])
 def index():
-    print(request.cookies)
-    cookie_value = True if request.cookies.get('username') == 'true' else False
-    if not cookie_value:
-        return render_template('answers.html', questions=list(storage.get_questions().values()))
-    else:
-        return "odgovoru si"
+    if request.cookies.get('username') == 'true':
+        resp = make_response(ANSWERED_MESSAGE)
+        resp.headers['Cache-Control'] = 'private, max-age=60'
+        return resp
+
+    html, etag = storage.get_rendered('index', render_index)
+    resp = make_response(html)
+    # Browsers revalidate every time, an unchanged form is answered with 304 Not Modified
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp.make_conditional(request)
 
 @app.route('/answer/', methods=['GET'])
 def answer():
-    for key, item in request.args.items():
-        storage.add_answer(int(key[6:]), item)
+    answers = [(int(key[6:]), item) for key, item in request.args.items() if key.startswith('answer')]
+    storage.add_answers(answers)
     resp = make_response("Cookie has been set!")
     resp.set_cookie('username', 'true')
     return redirect(url_for('index'))
@@ -77,13 +133,13 @@ def answer():
 
 @app.route('/game/<int:question_num>')
 def game(question_num):
-    question = list(storage.get_questions().values())[question_num]
+    question = storage.get_question_by_index(question_num)
     return render_template("game.html", question=question, admin=False)
 
 
 @app.route('/admin/game/<int:question_num>')
 def game_admin(question_num):
-    question = list(storage.get_questions().values())[question_num]
+    question = storage.get_question_by_index(question_num)
     return render_template("game.html", question=question, admin=True)
 
 @app.route('/game/button/', methods=['GET'])
@@ -92,13 +148,32 @@ def game_button():
 
 @app.route('/admin/')
 def admin():
-    return render_template('admin.html', questions=storage.get_questions())
+    return render_template('admin.html', questions=storage.get_questions_list())
+
+def log_grouping_failure(future):
+    error = future.exception()
+    if error is not None:
+        app.logger.error("Grouping and sorting the answers failed", exc_info=error)
 
 @app.route("/admin/group-and-sort")
 def group_all():
-    storage.questions.group_and_sort_all_questions()
+    global grouping_future
+    with grouping_lock:
+        # A run that is still going already picks up everything, so no second one is queued
+        if grouping_future is None or grouping_future.done():
+            grouping_future = grouping_executor.submit(storage.group_and_sort_all_questions)
+            grouping_future.add_done_callback(log_grouping_failure)
     return redirect(url_for("admin"))
 
+@app.route("/admin/group-and-sort/status")
+def group_all_status():
+    with grouping_lock:
+        future = grouping_future
+    running = future is not None and not future.done()
+    # The error of the last finished run, None when it succeeded
+    error = future.exception() if future is not None and future.done() else None
+    return jsonify(running=running, error=str(error) if error is not None else None)
+
 @app.route("/admin/questions/delans/<int:question_id>")
 def delans(question_id):
     storage.delete_answers(question_id)
@@ -106,5 +181,11 @@ def delans(question_id):
 
 
 if __name__ == '__main__':
-    app.run(host="192.168.3.27", port=5000)
+    try:
+        from waitress import serve
+    except ImportError:
+        # Werkzeug's development server, still one thread per request
+        app.run(host="192.168.3.27", port=5000, threaded=True)
+    else:
+        serve(app, host="192.168.3.27", port=5000, threads=8)
 
@@ -0,0 +1,55 @@
+import random
+import unittest
+
+from Question import StringQuestion
+
+
+def _typo_answers(count: int, seed: int) -> list[str]:
+    # Sport names with random substitutions, deletions and insertions, some in upper case
+    rng = random.Random(seed)
+    sports = ["football", "soccer", "basketball", "tennis", "volleyball", "hockey", "golf"]
+    answers = []
+    for _ in range(count):
+        chars = list(rng.choice(sports))
+        for _ in range(rng.randint(0, 3)):
+            k = rng.randrange(len(chars))
+            edit = rng.random()
+            if edit < 0.4:
+                chars[k] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+            elif edit < 0.7 and len(chars) > 1:
+                del chars[k]
+            else:
+                chars.insert(k, rng.choice("abcdefghij"))
+        answer = "".join(chars)
+        answers.append(answer.upper() if rng.random() < 0.1 else answer)
+    return answers
+
+
+class StringQuestionGroupTest(unittest.TestCase):
+    def test_incremental_grouping_matches_fresh_grouping(self):
+        answers = _typo_answers(300, seed=1)
+
+        for threshold in (70, 85):
+            fresh = StringQuestion("Favourite sport?", answers)
+            fresh.group(threshold=threshold)
+
+            incremental = StringQuestion("Favourite sport?", [])
+            for end in (20, 100, 200, 300):
+                for answer in answers[incremental.counter:end]:
+                    incremental.add_answer(answer)
+                incremental.group(threshold=threshold)
+
+            self.assertEqual(list(incremental.grouped.items()), list(fresh.grouped.items()))
+
+    def test_regrouping_restores_groups_cut_by_sorting(self):
+        question = StringQuestion("Favourite pet?", ["dog", "cat", "cow", "pig", "hen", "Dog"])
+        question.group()
+        question.sort_grouped_answers(top_k=2)
+
+        question.group()
+
+        self.assertEqual(dict(question.grouped), {"dog": 2, "cat": 1, "cow": 1, "pig": 1, "hen": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
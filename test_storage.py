@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import orjson
+
+from Question import Questions
+from Storage import Storage
+
+
+class StorageTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "questions.json")
+
+    def write_questions(self, question_ids):
+        questions = {
+            str(question_id): {
+                "question_text": f"Question {question_id}",
+                "type": "string",
+                "answers": [],
+                "grouped": {},
+                "id": question_id,
+            }
+            for question_id in question_ids
+        }
+        with open(self.path, "wb") as f:
+            f.write(orjson.dumps({"_default": {"1": {"questions": questions}}}))
+
+    def open_storage(self):
+        storage = Storage(self.path)
+        # Pending changes are flushed by each test, nothing is left for the atexit hook
+        self.addCleanup(storage.flush)
+        return storage
+
+
+class StorageFlushTest(StorageTestCase):
+    def test_flush_writes_pending_changes(self):
+        self.write_questions([1])
+        storage = self.open_storage()
+
+        storage.add_answer(1, "Football")
+        storage.add_answers([(1, "Soccer"), (1, "Football")])
+        storage.flush()
+
+        self.assertEqual(Storage(self.path).get_question(1).get_answers(), ["Football", "Soccer", "Football"])
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+    def test_flush_keeps_question_order(self):
+        self.write_questions([3, 5, 100])
+        storage = self.open_storage()
+
+        storage.add_answer(3, "Football")
+        storage.add_question("Question 101", "string")
+        storage.delete_question(5)
+        storage.flush()
+
+        self.assertEqual(list(Storage(self.path).get_questions()), [3, 100, 101])
+
+    def test_create_writes_to_disk(self):
+        storage = self.open_storage()
+
+        storage.create({"questions": {}})
+        self.assertGreater(os.path.getsize(self.path), 0)
+
+        storage.add_question("Question 1", "string")
+        storage.flush()
+
+        self.assertEqual(len(storage.db), 1)
+        self.assertEqual(list(Storage(self.path).get_questions()), [1])
+
+
+class StorageDuplicateTextTest(StorageTestCase):
+    def test_add_question_rejects_duplicate_text(self):
+        self.write_questions([1])
+        storage = self.open_storage()
+
+        self.assertFalse(storage.add_question("Question 1", "string"))
+        self.assertTrue(storage.add_question("Question 2", "string"))
+        storage.flush()
+
+        self.assertEqual(Storage(self.path).questions.get_questions_text(), ["Question 1", "Question 2"])
+
+    def test_edit_question_rejects_text_of_another_question(self):
+        self.write_questions([1, 2])
+        storage = self.open_storage()
+
+        self.assertFalse(storage.edit_question(2, "Question 1", "string"))
+        self.assertEqual(storage.get_question(2).question_text, "Question 2")
+        # Keeping its own text is not a duplicate
+        self.assertTrue(storage.edit_question(2, "Question 2", "string"))
+        self.assertTrue(storage.edit_question(2, "Question 3", "string"))
+        storage.flush()
+
+        self.assertEqual(Storage(self.path).questions.get_questions_text(), ["Question 1", "Question 3"])
+
+
+class StorageGroupingTest(StorageTestCase):
+    def test_grouping_skips_questions_reset_while_it_runs(self):
+        self.write_questions([1, 2])
+        storage = self.open_storage()
+        storage.add_answers([(1, "Football"), (1, "football"), (2, "Soccer")])
+        group_copies = Questions.group_and_sort_all_questions
+
+        def group_while_answering(copies, top_k=None):
+            # Runs on the copies, outside the storage lock
+            storage.delete_answers(2)
+            storage.add_answer(1, "Tennis")
+            group_copies(copies, top_k)
+
+        with mock.patch.object(Questions, "group_and_sort_all_questions", group_while_answering):
+            storage.group_and_sort_all_questions()
+        storage.flush()
+
+        for question_storage in (storage, Storage(self.path)):
+            self.assertEqual(dict(question_storage.get_question(1).grouped), {"Football": 2})
+            self.assertEqual(question_storage.get_question(1).get_answers(), ["Football", "football", "Tennis"])
+            self.assertEqual(dict(question_storage.get_question(2).grouped), {})
+            self.assertEqual(question_storage.get_question(2).get_answers(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()